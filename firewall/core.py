@@ -3,7 +3,9 @@ Prompt Firewall - Core Engine
 
 Orchestrates detection, policy evaluation, sanitization, and logging
 """
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 
 from .models import (
@@ -21,8 +23,12 @@ class PromptFirewall:
     
     Coordinates threat detection, policy enforcement, and audit logging
     """
-    
-    def __init__(self, 
+
+    # Identical prompts (health probes, app templates) repeat constantly in
+    # front of an LLM - cache their detection + policy decision
+    _CACHE_MAXSIZE = 8192
+
+    def __init__(self,
                  policy_config: Optional[str] = None,
                  use_prompt_shield: bool = True,
                  log_dir: str = "logs",
@@ -41,41 +47,68 @@ class PromptFirewall:
         self.policy_engine = get_policy_engine(config_path=policy_config)
         self.sanitizer = get_sanitizer()
         self.logger = get_logger(log_dir=log_dir, log_to_file=enable_logging)
-        
+
+        # LRU cache of prompt -> (detection, policy_match)
+        self._decision_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+
         print("\n[✓] Prompt Firewall initialized")
         print(f"    - Detection: {'Prompt-Shield ML' if use_prompt_shield else 'Pattern matching'}")
         print(f"    - Policies: {len(self.policy_engine.policies)} loaded")
         print(f"    - Logging: {'Enabled' if enable_logging else 'Disabled'}\n")
     
-    def check(self, prompt: str, 
+    def check(self, prompt: str,
              user_id: Optional[str] = None,
-             session_id: Optional[str] = None) -> FirewallResponse:
+             session_id: Optional[str] = None,
+             no_cache: bool = False) -> FirewallResponse:
         """
         Check prompt against firewall
-        
+
         Args:
             prompt: User prompt to analyze
             user_id: Optional user identifier
             session_id: Optional session identifier
-        
+            no_cache: Bypass the decision cache for this prompt
+
         Returns:
             FirewallResponse with decision
         """
         start_time = time.time()
-        
+
         # Create request
         request = FirewallRequest(
             prompt=prompt,
             user_id=user_id,
             session_id=session_id
         )
-        
-        # Step 1: Detect threats
-        detection = self.detector.detect(prompt)
-        
-        # Step 2: Evaluate against policies
-        policy_match = self.policy_engine.evaluate(detection)
-        
+
+        # Steps 1+2: Detect threats and evaluate policies - cached per
+        # prompt since neither depends on user or session. Entries are
+        # stamped with the policy-engine revision so decisions cached
+        # before an add_policy/remove_policy/reload are not served stale.
+        revision = self.policy_engine.revision
+        cached = None
+        if not no_cache:
+            with self._cache_lock:
+                cached = self._decision_cache.get(prompt)
+                if cached is not None:
+                    if cached[0] == revision:
+                        self._decision_cache.move_to_end(prompt)
+                    else:
+                        cached = None
+
+        if cached is not None:
+            _revision, detection, policy_match = cached
+        else:
+            detection = self.detector.detect(prompt)
+            policy_match = self.policy_engine.evaluate(detection)
+            if not no_cache:
+                with self._cache_lock:
+                    self._decision_cache[prompt] = (revision, detection,
+                                                    policy_match)
+                    if len(self._decision_cache) > self._CACHE_MAXSIZE:
+                        self._decision_cache.popitem(last=False)
+
         # Step 3: Execute policy action
         response = self._execute_action(
             request=request,
@@ -91,6 +124,54 @@ class PromptFirewall:
         
         return response
     
+    def check_batch(self, prompts,
+                    user_id: Optional[str] = None,
+                    session_id: Optional[str] = None):
+        """
+        Check multiple prompts against the firewall
+
+        Detection runs as one vectorized batch; policy evaluation and
+        logging are applied per prompt as usual.
+
+        Args:
+            prompts: List of prompts to analyze
+            user_id: Optional user identifier
+            session_id: Optional session identifier
+
+        Returns:
+            List of FirewallResponse, one per prompt
+        """
+        start_time = time.time()
+
+        detections = self.detector.detect_batch(prompts)
+
+        requests = []
+        responses = []
+        for prompt, detection in zip(prompts, detections):
+            request = FirewallRequest(
+                prompt=prompt,
+                user_id=user_id,
+                session_id=session_id
+            )
+            policy_match = self.policy_engine.evaluate(detection)
+            response = self._execute_action(
+                request=request,
+                detection=detection,
+                policy_match=policy_match
+            )
+            requests.append(request)
+            responses.append(response)
+
+        # Detection is shared across the batch - report the amortized time,
+        # stamped before logging so the audit entries carry real timings
+        elapsed_ms = (time.time() - start_time) * 1000
+        per_item_ms = elapsed_ms / len(prompts) if prompts else 0.0
+        for request, response in zip(requests, responses):
+            response.processing_time_ms = per_item_ms
+            self.logger.log_request(request, response)
+
+        return responses
+
     def _execute_action(self, request, detection, policy_match) -> FirewallResponse:
         """Execute policy action"""
         
@@ -114,7 +195,7 @@ class PromptFirewall:
         # SANITIZE
         elif action == Action.SANITIZE:
             sanitized, changes = self.sanitizer.sanitize(request.prompt)
-            
+
             return FirewallResponse(
                 action=Action.SANITIZE,
                 allowed=True,
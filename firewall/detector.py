@@ -14,6 +14,58 @@ except ImportError:
     PROMPT_SHIELD_AVAILABLE = False
     print("WARNING: prompt-shield not found. Using fallback detection.")
 
+# Optional: Aho-Corasick automaton for single-pass multi-pattern matching
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Optional: Hyperscan for SIMD-accelerated multi-pattern matching
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Optional: NumPy for vectorized batch detection
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Optional: Numba JIT for the pattern-scoring inner loop (needs NumPy)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _score_kernel(prompt_buf, pat_buf, pat_offsets, pat_lens, cat_ids):
+        """Count pattern hits in prompt_buf; returns (matches, category bitmask)"""
+        matches = 0
+        cat_mask = 0
+        n = prompt_buf.shape[0]
+        for p in range(pat_lens.shape[0]):
+            plen = pat_lens[p]
+            off = pat_offsets[p]
+            if plen > n:
+                continue
+            for i in range(n - plen + 1):
+                hit = True
+                for j in range(plen):
+                    if prompt_buf[i + j] != pat_buf[off + j]:
+                        hit = False
+                        break
+                if hit:
+                    matches += 1
+                    cat_mask |= 1 << cat_ids[p]
+                    break
+        return matches, cat_mask
+
 from .models import DetectionResult, ThreatLevel
 
 
@@ -45,20 +97,75 @@ class ThreatDetector:
             self.shield = None
             print("[!] Using fallback pattern-based detection")
         
-        # Fallback patterns for basic detection
-        self.malicious_patterns = [
-            "ignore previous instructions",
-            "ignore all previous",
-            "disregard",
-            "forget everything",
-            "new instructions",
-            "system prompt",
-            "you are now",
-            "roleplay as",
-            "jailbreak",
-            "DAN mode",
-            "developer mode"
+        # Fallback patterns for basic detection, tagged with threat category
+        self.pattern_categories = [
+            ("ignore previous instructions", "prompt_injection"),
+            ("ignore all previous", "prompt_injection"),
+            ("disregard", "prompt_injection"),
+            ("forget everything", "prompt_injection"),
+            ("new instructions", "prompt_injection"),
+            ("system prompt", "system_manipulation"),
+            ("you are now", "jailbreak"),
+            ("roleplay as", "jailbreak"),
+            ("jailbreak", "jailbreak"),
+            ("DAN mode", "jailbreak"),
+            ("developer mode", "jailbreak")
         ]
+        # Interned category names make the policy engine's frozenset
+        # category checks pointer comparisons
+        self.pattern_categories = [
+            (p, sys.intern(c)) for p, c in self.pattern_categories]
+        self.malicious_patterns = [p for p, _ in self.pattern_categories]
+
+        self._patterns_lower = [(p.lower(), c) for p, c in self.pattern_categories]
+
+        # Pattern indices grouped by category, for batch detection
+        self._category_indices: Dict[str, list] = {}
+        for idx, (_pattern, category) in enumerate(self.pattern_categories):
+            self._category_indices.setdefault(category, []).append(idx)
+
+        # Flat byte buffers for the Numba scoring kernel, warmed up here so
+        # the JIT compile cost isn't paid on the first request
+        self._category_names = tuple(self._category_indices)
+        if NUMBA_AVAILABLE:
+            cat_id_of = {c: i for i, c in enumerate(self._category_names)}
+            pattern_bytes = [p.encode() for p, _ in self._patterns_lower]
+            self._pat_buf = np.frombuffer(b"".join(pattern_bytes), dtype=np.uint8)
+            lens = [len(b) for b in pattern_bytes]
+            self._pat_offsets = np.array(
+                [sum(lens[:i]) for i in range(len(lens))], dtype=np.int64)
+            self._pat_lens = np.array(lens, dtype=np.int64)
+            self._cat_ids = np.array(
+                [cat_id_of[c] for _, c in self._patterns_lower], dtype=np.int64)
+            _score_kernel(np.frombuffer(b"warmup", dtype=np.uint8),
+                          self._pat_buf, self._pat_offsets,
+                          self._pat_lens, self._cat_ids)
+
+        # Compile all patterns into one Hyperscan database when available:
+        # a single caseless SIMD scan replaces both the lowering step and
+        # the per-pattern walks
+        self._hs_db = None
+        if HYPERSCAN_AVAILABLE:
+            try:
+                db = hyperscan.Database()
+                db.compile(
+                    expressions=[p.encode() for p in self.malicious_patterns],
+                    ids=list(range(len(self.malicious_patterns))),
+                    flags=[hyperscan.HS_FLAG_CASELESS] * len(self.malicious_patterns)
+                )
+                self._hs_db = db
+            except Exception as e:
+                print(f"[!] Failed to compile Hyperscan database: {e}")
+
+        # Build Aho-Corasick automaton once so detection is a single
+        # O(len(prompt)) pass regardless of how many patterns we carry
+        if AHOCORASICK_AVAILABLE:
+            self._ac = ahocorasick.Automaton()
+            for idx, (pattern, category) in enumerate(self.pattern_categories):
+                self._ac.add_word(pattern.lower(), (idx, category))
+            self._ac.make_automaton()
+        else:
+            self._ac = None
     
     def detect(self, prompt: str, threshold: float = 0.5) -> DetectionResult:
         """
@@ -75,7 +182,75 @@ class ThreatDetector:
             return self._detect_with_shield(prompt, threshold)
         else:
             return self._detect_with_patterns(prompt)
-    
+
+    def detect_batch(self, prompts: list, threshold: float = 0.5) -> list:
+        """
+        Detect threats in multiple prompts at once
+
+        Args:
+            prompts: List of user prompts to analyze
+            threshold: Threat score threshold (0-1)
+
+        Returns:
+            List of DetectionResult, one per prompt
+        """
+        if self.use_prompt_shield and self.shield:
+            return [self._detect_with_shield(p, threshold) for p in prompts]
+
+        if NUMPY_AVAILABLE and prompts:
+            return self._detect_batch_numpy(prompts)
+
+        return [self._detect_with_patterns(p) for p in prompts]
+
+    def _detect_batch_numpy(self, prompts: list) -> list:
+        """Vectorized pattern detection over a whole batch"""
+        arr = np.char.lower(np.asarray(prompts, dtype=np.str_))
+
+        # (N, P) boolean matrix: prompt i contains pattern j
+        hit_matrix = np.stack(
+            [np.char.find(arr, pattern) >= 0
+             for pattern, _category in self._patterns_lower],
+            axis=1
+        )
+        match_counts = hit_matrix.sum(axis=1)
+        scores = np.minimum(match_counts * 20, 100)
+
+        # (category -> (N,) boolean vector) via OR over pattern-index groups
+        category_hits = {
+            category: hit_matrix[:, indices].any(axis=1)
+            for category, indices in self._category_indices.items()
+        }
+
+        results = []
+        for i in range(len(prompts)):
+            threat_score = int(scores[i])
+            categories = frozenset(
+                category for category, hits in category_hits.items() if hits[i]
+            )
+            results.append(DetectionResult(
+                threat_score=threat_score,
+                threat_level=self._score_to_level(threat_score),
+                is_malicious=threat_score >= 40,
+                categories=categories,
+                confidence=0.7,
+                details={"matches": int(match_counts[i]),
+                         "method": "pattern_matching_batch"}
+            ))
+        return results
+
+    @staticmethod
+    def _score_to_level(threat_score: float) -> ThreatLevel:
+        """Map a 0-100 threat score to a threat level"""
+        if threat_score >= 80:
+            return ThreatLevel.CRITICAL
+        elif threat_score >= 60:
+            return ThreatLevel.HIGH
+        elif threat_score >= 40:
+            return ThreatLevel.MEDIUM
+        elif threat_score >= 20:
+            return ThreatLevel.LOW
+        return ThreatLevel.SAFE
+
     def _detect_with_shield(self, prompt: str, threshold: float) -> DetectionResult:
         """Use Prompt-Shield ML models for detection"""
         try:
@@ -102,7 +277,7 @@ class ThreatDetector:
                 threat_score=threat_score * 100,  # Convert to 0-100
                 threat_level=level,
                 is_malicious=is_malicious,
-                categories=result.get("categories", []),
+                categories=frozenset(result.get("categories", ())),
                 confidence=result.get("confidence", 0.0),
                 details=result.get("details", {})
             )
@@ -113,45 +288,62 @@ class ThreatDetector:
     
     def _detect_with_patterns(self, prompt: str) -> DetectionResult:
         """Fallback pattern-based detection"""
+        # Count pattern matches and collect categories in one scan
+        category_hits = set()
+        if self._hs_db is not None:
+            seen_ids = set()
+            self._hs_db.scan(
+                prompt.encode(),
+                match_event_handler=lambda pat_id, start, end, flags, ctx:
+                    seen_ids.add(pat_id)
+            )
+            category_hits.update(
+                self.pattern_categories[pat_id][1] for pat_id in seen_ids)
+            return self._build_pattern_result(len(seen_ids), category_hits)
+
         prompt_lower = prompt.lower()
-        
-        # Count pattern matches
-        matches = sum(1 for pattern in self.malicious_patterns 
-                     if pattern in prompt_lower)
-        
+
+        if self._ac is not None:
+            # The automaton reports every occurrence; count unique patterns
+            # so scores match the other scan paths
+            seen_ids = set()
+            for _end, (idx, category) in self._ac.iter(prompt_lower):
+                seen_ids.add(idx)
+                category_hits.add(category)
+            matches = len(seen_ids)
+        elif NUMBA_AVAILABLE:
+            prompt_buf = np.frombuffer(prompt_lower.encode("utf-8"),
+                                       dtype=np.uint8)
+            matches, cat_mask = _score_kernel(
+                prompt_buf, self._pat_buf, self._pat_offsets,
+                self._pat_lens, self._cat_ids)
+            category_hits.update(
+                name for i, name in enumerate(self._category_names)
+                if cat_mask >> i & 1)
+        else:
+            matches = 0
+            for pattern, category in self._patterns_lower:
+                if pattern in prompt_lower:
+                    matches += 1
+                    category_hits.add(category)
+
+        return self._build_pattern_result(matches, category_hits)
+
+    def _build_pattern_result(self, matches: int,
+                              category_hits: set) -> DetectionResult:
+        """Build a DetectionResult from a pattern-scan match count"""
         # Calculate threat score based on matches
         threat_score = min(matches * 20, 100)  # Each match = 20 points, max 100
-        
-        # Determine threat level
-        if threat_score >= 80:
-            level = ThreatLevel.CRITICAL
-        elif threat_score >= 60:
-            level = ThreatLevel.HIGH
-        elif threat_score >= 40:
-            level = ThreatLevel.MEDIUM
-        elif threat_score >= 20:
-            level = ThreatLevel.LOW
-        else:
-            level = ThreatLevel.SAFE
-        
-        is_malicious = threat_score >= 40
-        
-        # Identify categories
-        categories = []
-        if "ignore" in prompt_lower or "disregard" in prompt_lower:
-            categories.append("prompt_injection")
-        if "roleplay" in prompt_lower or "you are now" in prompt_lower:
-            categories.append("jailbreak")
-        if "system" in prompt_lower:
-            categories.append("system_manipulation")
-        
+
+        details = {"matches": matches, "method": "pattern_matching"}
+
         return DetectionResult(
             threat_score=threat_score,
-            threat_level=level,
-            is_malicious=is_malicious,
-            categories=categories,
+            threat_level=self._score_to_level(threat_score),
+            is_malicious=threat_score >= 40,
+            categories=frozenset(category_hits),
             confidence=0.7,  # Lower confidence for pattern matching
-            details={"matches": matches, "method": "pattern_matching"}
+            details=details
         )
 
 
@@ -1,20 +1,53 @@
 """
 Audit Logger - Track all firewall decisions and threats
 """
+import atexit
+import itertools
 import json
-import uuid
+import os
+import queue
+import threading
+import time
+from collections import deque
 from pathlib import Path
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 
-from .models import AuditLog, Action, ThreatLevel, FirewallRequest, FirewallResponse
+from .models import Action, ThreatLevel, FirewallRequest, FirewallResponse
+
+# Threat levels that go to the separate threats log / stats counter
+_ELEVATED_LEVELS = frozenset({ThreatLevel.HIGH, ThreatLevel.CRITICAL})
+
+# Optional: orjson serializes the small flat log dicts several times faster
+# than stdlib json and returns bytes directly
+try:
+    import orjson
+
+    def _dumps(data: Dict[str, Any]) -> bytes:
+        return orjson.dumps(data)
+except ImportError:
+    def _dumps(data: Dict[str, Any]) -> bytes:
+        return json.dumps(data).encode()
+
+
+def _ensure_iso_timestamp(entry: Dict[str, Any]):
+    """Render a raw time.time_ns() stamp to ISO-8601, once, in place"""
+    ts = entry.get("timestamp")
+    if isinstance(ts, int):
+        entry["timestamp"] = datetime.fromtimestamp(
+            ts / 1e9, tz=timezone.utc).isoformat()
 
 
 class AuditLogger:
     """
     Audit logger for compliance and threat tracking
     """
-    
+
+    # Background writer tuning: coalesce up to this many entries per batch,
+    # waiting at most this long for stragglers before writing
+    _BATCH_SIZE = 256
+    _BATCH_WINDOW_S = 0.010
+
     def __init__(self, log_dir: str = "logs", log_to_file: bool = True):
         """
         Initialize audit logger
@@ -28,13 +61,36 @@ class AuditLogger:
         
         if self.log_to_file:
             self.log_dir.mkdir(parents=True, exist_ok=True)
-            
+
             # Create log files
             self.audit_log_path = self.log_dir / "audit.jsonl"
             self.threats_log_path = self.log_dir / "threats.jsonl"
             self.metrics_log_path = self.log_dir / "metrics.jsonl"
-        
-        # In-memory stats
+
+            # Entries are queued here and written in batches by a daemon
+            # thread, so the request path never blocks on file I/O
+            self._write_queue: queue.SimpleQueue = queue.SimpleQueue()
+            self._file_handles: Dict[Path, Any] = {}
+            self._write_lock = threading.Lock()
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop, daemon=True,
+                name="audit-log-writer"
+            )
+            self._writer_thread.start()
+            atexit.register(self.flush)
+
+        # Recent entries kept in memory so /threats and log queries don't
+        # have to re-read ever-growing files
+        self._recent_logs: deque = deque(maxlen=1024)
+        self._recent_threats: deque = deque(maxlen=1024)
+
+        # Cheap per-process request-id source (pid prefix + counter)
+        self._pid = os.getpid()
+        self._id_counter = itertools.count()
+
+        # In-memory stats; log_request runs on several threadpool workers
+        # at once, so the read-modify-write updates take this lock
+        self._stats_lock = threading.Lock()
         self.stats = {
             "total_requests": 0,
             "blocked": 0,
@@ -55,122 +111,222 @@ class AuditLogger:
         Returns:
             Request ID
         """
-        request_id = str(uuid.uuid4())
-        
-        # Create audit log entry
-        log_entry = AuditLog(
-            request_id=request_id,
-            timestamp=datetime.utcnow(),
-            user_id=request.user_id,
-            session_id=request.session_id,
-            prompt=request.prompt,
-            action=response.action,
-            threat_score=response.threat_score,
-            threat_level=response.threat_level,
-            policy_matched=response.policy_match.policy_name if response.policy_match else None,
-            metadata={
+        # Counter + pid ids avoid a urandom syscall per request; timestamps
+        # are raw time_ns() ints rendered to ISO off the hot path
+        request_id = f"{self._pid}-{next(self._id_counter)}"
+
+        entry_dict = {
+            "request_id": request_id,
+            "timestamp": time.time_ns(),
+            "user_id": request.user_id,
+            "session_id": request.session_id,
+            "prompt": request.prompt,
+            "action": response.action,
+            "threat_score": response.threat_score,
+            "threat_level": response.threat_level,
+            "policy_matched": response.policy_match.policy_name if response.policy_match else None,
+            "metadata": {
                 "processing_time_ms": response.processing_time_ms,
                 "sanitized": response.sanitized_prompt is not None,
                 "detection_details": response.detection.details if response.detection else {}
             }
-        )
-        
+        }
+        self._recent_logs.append(entry_dict)
+
+        threat_dict = None
+        if response.threat_level in _ELEVATED_LEVELS:
+            threat_dict = {
+                **entry_dict,
+                "threat_details": {
+                    # Stored as a frozenset on the model; sorted here so the
+                    # entry stays JSON-serializable
+                    "categories": sorted(response.detection.categories) if response.detection else [],
+                    "confidence": response.detection.confidence if response.detection else 0.0
+                }
+            }
+            self._recent_threats.append(threat_dict)
+
         # Write to file
         if self.log_to_file:
-            self._write_log(self.audit_log_path, log_entry.to_dict())
-            
+            self._write_log(self.audit_log_path, entry_dict)
+
             # Write threats to separate file
-            if response.threat_level in [ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
-                self._write_log(self.threats_log_path, {
-                    **log_entry.to_dict(),
-                    "threat_details": {
-                        "categories": response.detection.categories if response.detection else [],
-                        "confidence": response.detection.confidence if response.detection else 0.0
-                    }
-                })
-        
+            if threat_dict is not None:
+                self._write_log(self.threats_log_path, threat_dict)
+
         # Update stats
-        self.stats["total_requests"] += 1
-        
-        if response.action == Action.BLOCK:
-            self.stats["blocked"] += 1
-        elif response.action == Action.SANITIZE:
-            self.stats["sanitized"] += 1
-        elif response.action == Action.ALLOW:
-            self.stats["allowed"] += 1
-        
-        if response.threat_level in [ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
-            self.stats["threats_detected"] += 1
-        
+        with self._stats_lock:
+            self.stats["total_requests"] += 1
+
+            if response.action == Action.BLOCK:
+                self.stats["blocked"] += 1
+            elif response.action == Action.SANITIZE:
+                self.stats["sanitized"] += 1
+            elif response.action == Action.ALLOW:
+                self.stats["allowed"] += 1
+
+            if response.threat_level in _ELEVATED_LEVELS:
+                self.stats["threats_detected"] += 1
+
         return request_id
     
     def _write_log(self, path: Path, data: Dict[str, Any]):
-        """Write JSON line to log file"""
-        try:
-            with open(path, 'a') as f:
-                f.write(json.dumps(data) + '\n')
-        except Exception as e:
-            print(f"[!] Failed to write log: {e}")
-    
+        """Queue JSON line for the background writer"""
+        self._write_queue.put((path, data))
+
+    def _writer_loop(self):
+        """Drain the write queue, batching entries to amortize I/O"""
+        while True:
+            batch = [self._write_queue.get()]
+            deadline = time.monotonic() + self._BATCH_WINDOW_S
+            while len(batch) < self._BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._write_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        """Serialize and append a batch of (path, data) entries"""
+        by_path: Dict[Path, List[bytes]] = {}
+        for path, data in batch:
+            _ensure_iso_timestamp(data)
+            by_path.setdefault(path, []).append(_dumps(data) + b'\n')
+
+        with self._write_lock:
+            for path, lines in by_path.items():
+                try:
+                    f = self._file_handles.get(path)
+                    if f is None:
+                        # Binary append skips the text-mode encoder entirely
+                        f = open(path, 'ab', buffering=1 << 16)
+                        self._file_handles[path] = f
+                    f.writelines(lines)
+                    f.flush()
+                except Exception as e:
+                    print(f"[!] Failed to write log: {e}")
+
+    def flush(self):
+        """Drain any queued entries and flush file buffers"""
+        if not self.log_to_file:
+            return
+
+        pending = []
+        while True:
+            try:
+                pending.append(self._write_queue.get_nowait())
+            except queue.Empty:
+                break
+        if pending:
+            self._write_batch(pending)
+
+        with self._write_lock:
+            for f in self._file_handles.values():
+                try:
+                    f.flush()
+                except Exception:
+                    pass
+
     def get_stats(self) -> Dict[str, Any]:
         """Get current statistics"""
-        total = self.stats["total_requests"]
-        
+        with self._stats_lock:
+            stats = dict(self.stats)
+        total = stats["total_requests"]
+
         return {
-            **self.stats,
-            "block_rate": (self.stats["blocked"] / total * 100) if total > 0 else 0,
-            "sanitize_rate": (self.stats["sanitized"] / total * 100) if total > 0 else 0,
-            "threat_rate": (self.stats["threats_detected"] / total * 100) if total > 0 else 0
+            **stats,
+            "block_rate": (stats["blocked"] / total * 100) if total > 0 else 0,
+            "sanitize_rate": (stats["sanitized"] / total * 100) if total > 0 else 0,
+            "threat_rate": (stats["threats_detected"] / total * 100) if total > 0 else 0
         }
     
     def get_recent_threats(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent threat entries"""
-        if not self.log_to_file or not self.threats_log_path.exists():
-            return []
-        
-        threats = []
-        try:
-            with open(self.threats_log_path, 'r') as f:
-                lines = f.readlines()
-                # Get last N lines
-                for line in lines[-limit:]:
-                    threats.append(json.loads(line))
-        except Exception as e:
-            print(f"[!] Failed to read threats: {e}")
-        
-        return threats
-    
+        return self._get_recent(self._recent_threats,
+                                self.threats_log_path if self.log_to_file else None,
+                                limit)
+
     def get_recent_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent audit logs"""
-        if not self.log_to_file or not self.audit_log_path.exists():
-            return []
-        
-        logs = []
+        return self._get_recent(self._recent_logs,
+                                self.audit_log_path if self.log_to_file else None,
+                                limit)
+
+    def _get_recent(self, recent: deque, path: Optional[Path],
+                    limit: int) -> List[Dict[str, Any]]:
+        """Serve recent entries from memory, falling back to a tail read
+
+        The file is only consulted on cold start (fresh process, history on
+        disk) and even then only its tail is read - never the whole file.
+        """
+        if len(recent) >= limit or path is None or not path.exists():
+            entries = list(recent)[-limit:]
+            for entry in entries:
+                _ensure_iso_timestamp(entry)
+            return entries
+
+        self.flush()
+        entries = []
         try:
-            with open(self.audit_log_path, 'r') as f:
-                lines = f.readlines()
-                for line in lines[-limit:]:
-                    logs.append(json.loads(line))
+            for line in self._tail_lines(path, limit):
+                entries.append(json.loads(line))
         except Exception as e:
             print(f"[!] Failed to read logs: {e}")
-        
-        return logs
-    
+            entries = []
+
+        if len(entries) < len(recent):
+            entries = list(recent)[-limit:]
+        for entry in entries:
+            _ensure_iso_timestamp(entry)
+        return entries
+
+    @staticmethod
+    def _tail_lines(path: Path, limit: int) -> List[bytes]:
+        """Read the last `limit` lines of a file via backwards block reads"""
+        block_size = 1 << 16
+        data = b''
+        with open(path, 'rb') as f:
+            f.seek(0, 2)
+            pos = f.tell()
+            while pos > 0 and data.count(b'\n') <= limit:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        return [line for line in data.splitlines() if line][-limit:]
+
     def clear_logs(self):
         """Clear all log files (use with caution!)"""
         if self.log_to_file:
+            self.flush()
+            with self._write_lock:
+                for f in self._file_handles.values():
+                    try:
+                        f.close()
+                    except Exception:
+                        pass
+                self._file_handles.clear()
             for path in [self.audit_log_path, self.threats_log_path, self.metrics_log_path]:
                 if path.exists():
                     path.unlink()
-        
+
+        # Drop the in-memory copies too, so the getters don't keep serving
+        # entries whose files were just deleted
+        self._recent_logs.clear()
+        self._recent_threats.clear()
+
         # Reset stats
-        self.stats = {
-            "total_requests": 0,
-            "blocked": 0,
-            "sanitized": 0,
-            "allowed": 0,
-            "threats_detected": 0
-        }
+        with self._stats_lock:
+            self.stats = {
+                "total_requests": 0,
+                "blocked": 0,
+                "sanitized": 0,
+                "allowed": 0,
+                "threats_detected": 0
+            }
 
 
 # Singleton instance
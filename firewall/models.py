@@ -1,14 +1,24 @@
 """
 Data models for Prompt Firewall
 """
+import time
 from enum import Enum
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, FrozenSet
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 
 
-class ThreatLevel(Enum):
-    """Threat severity levels"""
+def _iso_utc(timestamp_ns: int) -> str:
+    """Render a time.time_ns() stamp as an ISO-8601 UTC string"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat()
+
+
+class ThreatLevel(str, Enum):
+    """Threat severity levels
+
+    The str mixin makes members their own wire value, so they serialize
+    through json/orjson directly without a .value hop.
+    """
     SAFE = "safe"
     LOW = "low"
     MEDIUM = "medium"
@@ -16,7 +26,7 @@ class ThreatLevel(Enum):
     CRITICAL = "critical"
 
 
-class Action(Enum):
+class Action(str, Enum):
     """Policy actions"""
     ALLOW = "allow"
     BLOCK = "block"
@@ -25,38 +35,44 @@ class Action(Enum):
     ALERT = "alert"
 
 
-@dataclass
+@dataclass(slots=True)
 class DetectionResult:
     """Result from threat detection"""
     threat_score: float  # 0-100
     threat_level: ThreatLevel
     is_malicious: bool
-    categories: List[str] = field(default_factory=list)
+    # Frozenset so policy category filters are hash lookups, not scans
+    categories: FrozenSet[str] = field(default_factory=frozenset)
     confidence: float = 0.0
     details: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class PolicyMatch:
     """Matched policy rule"""
     policy_name: str
     action: Action
     severity: ThreatLevel
     reason: str
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    # None sentinel rather than default_factory=dict: most matches carry
+    # no metadata and the empty-dict allocation per instance adds up
+    metadata: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FirewallRequest:
     """Incoming request to firewall"""
     prompt: str
     user_id: Optional[str] = None
     session_id: Optional[str] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    # None sentinel avoids an empty-dict allocation per request
+    metadata: Optional[Dict[str, Any]] = None
+    # Raw time.time_ns() - far cheaper to stamp than a datetime; rendered
+    # to ISO only at serialization time
+    timestamp_ns: int = field(default_factory=time.time_ns)
 
 
-@dataclass
+@dataclass(slots=True)
 class FirewallResponse:
     """Firewall decision"""
     action: Action
@@ -68,29 +84,36 @@ class FirewallResponse:
     detection: Optional[DetectionResult] = None
     policy_match: Optional[PolicyMatch] = None
     message: str = ""
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    # Raw time.time_ns() - far cheaper to stamp than a datetime; rendered
+    # to ISO only at serialization time
+    timestamp_ns: int = field(default_factory=time.time_ns)
     processing_time_ms: float = 0.0
 
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary"""
+        """Convert to a JSON-native dictionary
+
+        All values are JSON-native (the str-mixin enums serialize as their
+        string values), so the result can go straight to orjson.dumps with
+        no default= hook.
+        """
         return {
-            "action": self.action.value,
+            "action": self.action,
             "allowed": self.allowed,
             "original_prompt": self.original_prompt,
             "sanitized_prompt": self.sanitized_prompt,
             "threat_score": self.threat_score,
-            "threat_level": self.threat_level.value,
+            "threat_level": self.threat_level,
             "message": self.message,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": _iso_utc(self.timestamp_ns),
             "processing_time_ms": self.processing_time_ms
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class AuditLog:
     """Audit log entry"""
     request_id: str
-    timestamp: datetime
+    timestamp_ns: int
     user_id: Optional[str]
     session_id: Optional[str]
     prompt: str
@@ -98,19 +121,23 @@ class AuditLog:
     threat_score: float
     threat_level: ThreatLevel
     policy_matched: Optional[str]
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    metadata: Optional[Dict[str, Any]] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary"""
+        """Convert to a JSON-native dictionary
+
+        Values are primitives apart from `metadata`, which callers must
+        keep JSON-native for the dict to serialize directly via orjson.
+        """
         return {
             "request_id": self.request_id,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": _iso_utc(self.timestamp_ns),
             "user_id": self.user_id,
             "session_id": self.session_id,
             "prompt": self.prompt,
-            "action": self.action.value,
+            "action": self.action,
             "threat_score": self.threat_score,
-            "threat_level": self.threat_level.value,
+            "threat_level": self.threat_level,
             "policy_matched": self.policy_matched,
-            "metadata": self.metadata
+            "metadata": self.metadata or {}
         }
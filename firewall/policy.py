@@ -2,11 +2,33 @@
 Policy Engine - Rule-based decision making
 """
 from typing import Dict, List, Optional, Any
+import functools
+import logging
+import sys
 import yaml
+from dataclasses import replace
 from pathlib import Path
 
+# LibYAML's C parser is several times faster than the pure-Python
+# SafeLoader that yaml.safe_load falls back to
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 from .models import Action, ThreatLevel, DetectionResult, PolicyMatch
 
+logger = logging.getLogger(__name__)
+
+# Severity ranking, hoisted so matches() doesn't rebuild it per call
+_SEV_ORDER = {
+    ThreatLevel.SAFE: 0,
+    ThreatLevel.LOW: 1,
+    ThreatLevel.MEDIUM: 2,
+    ThreatLevel.HIGH: 3,
+    ThreatLevel.CRITICAL: 4
+}
+
 
 class Policy:
     """Single policy rule"""
@@ -25,7 +47,26 @@ class Policy:
         self.threshold = config.get("threshold", 0.5)
         self.description = config.get("description", "")
         self.conditions = config.get("conditions", {})
-    
+
+        # Comparator state, precomputed since policies are immutable after
+        # load: threshold on the 0-100 score scale (drops a division per
+        # call) and required categories as a frozenset
+        self._severity_rank = _SEV_ORDER[self.severity]
+        self._threshold_x100 = self.threshold * 100
+        self._required_cats = frozenset(
+            map(sys.intern, self.conditions.get("categories", ())))
+        self._has_cats = bool(self._required_cats)
+
+        # Everything in a PolicyMatch except the detection score is fixed
+        # per policy, so build it once and copy on match
+        self._match_template = PolicyMatch(
+            policy_name=self.name,
+            action=self.action,
+            severity=self.severity,
+            reason=self.description or f"Matched policy: {self.name}",
+            metadata={"threshold": self.threshold}
+        )
+
     def matches(self, detection: DetectionResult) -> bool:
         """
         Check if detection matches this policy
@@ -38,38 +79,27 @@ class Policy:
         """
         if not self.enabled:
             return False
-        
+
         # Check threat score threshold
-        if detection.threat_score / 100 < self.threshold:
+        if detection.threat_score < self._threshold_x100:
             return False
-        
+
         # Check severity level
-        severity_order = {
-            ThreatLevel.SAFE: 0,
-            ThreatLevel.LOW: 1,
-            ThreatLevel.MEDIUM: 2,
-            ThreatLevel.HIGH: 3,
-            ThreatLevel.CRITICAL: 4
-        }
-        
-        if severity_order[detection.threat_level] < severity_order[self.severity]:
+        if _SEV_ORDER[detection.threat_level] < self._severity_rank:
             return False
-        
+
         # Check categories if specified
-        if "categories" in self.conditions:
-            required_cats = self.conditions["categories"]
-            if not any(cat in detection.categories for cat in required_cats):
-                return False
-        
+        if self._has_cats and self._required_cats.isdisjoint(detection.categories):
+            return False
+
         return True
     
     def to_match(self, detection: DetectionResult) -> PolicyMatch:
         """Convert to PolicyMatch"""
-        return PolicyMatch(
-            policy_name=self.name,
-            action=self.action,
-            severity=self.severity,
-            reason=self.description or f"Matched policy: {self.name}",
+        # Copy the template rather than rebuilding every field; a fresh
+        # metadata dict keeps the shared template immutable
+        return replace(
+            self._match_template,
             metadata={
                 "threshold": self.threshold,
                 "detection_score": detection.threat_score
@@ -77,6 +107,15 @@ class Policy:
         )
 
 
+# Shared fallback match returned when no policy fires
+_DEFAULT_ALLOW = PolicyMatch(
+    policy_name="default_allow",
+    action=Action.ALLOW,
+    severity=ThreatLevel.SAFE,
+    reason="No policy matched - default allow"
+)
+
+
 class PolicyEngine:
     """
     Policy Engine - Evaluates detection results against policies
@@ -90,7 +129,11 @@ class PolicyEngine:
             config_path: Path to YAML policy configuration
         """
         self.policies: List[Policy] = []
-        
+
+        # Bumped whenever the policy set changes, so callers caching
+        # evaluation results can tell their entries are stale
+        self.revision = 0
+
         if config_path:
             self.load_policies(config_path)
         else:
@@ -100,17 +143,19 @@ class PolicyEngine:
         """Load policies from YAML file"""
         try:
             with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=_YamlLoader)
             
             self.policies = []
             for policy_config in config.get("policies", []):
                 policy = Policy(policy_config)
                 self.policies.append(policy)
             
-            print(f"[✓] Loaded {len(self.policies)} policies from {config_path}")
-        
+            self.revision += 1
+            logger.info("Loaded %d policies from %s",
+                        len(self.policies), config_path)
+
         except Exception as e:
-            print(f"[!] Failed to load policies: {e}")
+            logger.warning("Failed to load policies: %s", e)
             self._load_default_policies()
     
     def _load_default_policies(self):
@@ -151,8 +196,9 @@ class PolicyEngine:
         ]
         
         self.policies = [Policy(config) for config in default_policies]
-        print(f"[✓] Loaded {len(self.policies)} default policies")
-    
+        self.revision += 1
+        logger.info("Loaded %d default policies", len(self.policies))
+
     def evaluate(self, detection: DetectionResult) -> Optional[PolicyMatch]:
         """
         Evaluate detection against all policies
@@ -163,37 +209,39 @@ class PolicyEngine:
         Returns:
             First matching PolicyMatch, or None
         """
-        # Policies are evaluated in order - first match wins
+        # Policies are evaluated in order - first match wins; the cheap
+        # precomputed threshold test in matches() rejects non-candidates
+        # before the severity and category checks run
         for policy in self.policies:
             if policy.matches(detection):
                 return policy.to_match(detection)
         
-        # Default: allow if no policy matches
-        return PolicyMatch(
-            policy_name="default_allow",
-            action=Action.ALLOW,
-            severity=ThreatLevel.SAFE,
-            reason="No policy matched - default allow"
-        )
+        # Default: allow if no policy matches - a single shared instance,
+        # since the fallback match is entirely constant
+        return _DEFAULT_ALLOW
     
     def add_policy(self, policy_config: Dict[str, Any]):
         """Add new policy dynamically"""
         policy = Policy(policy_config)
         self.policies.append(policy)
+        self.revision += 1
     
     def remove_policy(self, name: str) -> bool:
         """Remove policy by name"""
         original_len = len(self.policies)
         self.policies = [p for p in self.policies if p.name != name]
-        return len(self.policies) < original_len
+        removed = len(self.policies) < original_len
+        if removed:
+            self.revision += 1
+        return removed
 
 
-# Singleton instance
-_policy_engine = None
+# Singleton instances, one per config path; lru_cache handles both the
+# caching and the thread-safety of first construction
+@functools.lru_cache(maxsize=None)
+def _make_policy_engine(config_path: Optional[str]) -> PolicyEngine:
+    return PolicyEngine(config_path=config_path)
 
 def get_policy_engine(config_path: Optional[str] = None) -> PolicyEngine:
-    """Get or create policy engine instance"""
-    global _policy_engine
-    if _policy_engine is None:
-        _policy_engine = PolicyEngine(config_path=config_path)
-    return _policy_engine
+    """Get or create the policy engine instance for a config path"""
+    return _make_policy_engine(config_path)
@@ -2,19 +2,58 @@
 Prompt Sanitizer - Clean prompts of malicious content and PII
 """
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+# Optional: Hyperscan matches every sanitizer pattern in one SIMD pass,
+# letting sanitize skip whole pattern groups that cannot hit
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Optional: Numba compiles the digit-run prefilter into a native byte
+# scan; without it a tiny \d\d\d regex probe serves the same purpose
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _digit_run_kernel(buf):
+        """Return True if buf contains a run of 3+ ASCII digit bytes"""
+        run = 0
+        for i in range(buf.shape[0]):
+            if 48 <= buf[i] <= 57:
+                run += 1
+                if run >= 3:
+                    return True
+            else:
+                run = 0
+        return False
 
 
 class PromptSanitizer:
     """
     Sanitize prompts by removing or replacing malicious patterns
     """
-    
+
+    # Rewrites unescaped capturing groups to non-capturing when building
+    # union alternations, so m.lastgroup always names the alternative
+    _CAPTURING_GROUP = re.compile(r"(?<!\\)\((?!\?)")
+
+    # Shortest input the key/token patterns ({32,} quantifiers) can match;
+    # shorter prompts skip them entirely
+    _MIN_TOKEN_LEN = 32
+
     def __init__(self):
         """Initialize sanitizer with patterns"""
-        
+
         # Malicious instruction patterns
-        self.instruction_patterns = [
+        instruction_patterns = [
             (r"ignore\s+(all\s+)?(previous|prior|above)\s+instructions?", "[INSTRUCTION_REMOVED]"),
             (r"disregard\s+(all\s+)?(previous|prior|above)", "[INSTRUCTION_REMOVED]"),
             (r"forget\s+(everything|all|what)", "[INSTRUCTION_REMOVED]"),
@@ -28,7 +67,7 @@ class PromptSanitizer:
         ]
         
         # PII patterns
-        self.pii_patterns = [
+        pii_patterns = [
             # SSN
             (r"\b\d{3}-\d{2}-\d{4}\b", "[SSN_REDACTED]"),
             (r"\b\d{9}\b", "[SSN_REDACTED]"),
@@ -49,86 +88,262 @@ class PromptSanitizer:
         ]
         
         # SQL injection patterns
-        self.sql_patterns = [
+        sql_patterns = [
             (r"';?\s*(DROP|DELETE|INSERT|UPDATE|SELECT)\s+", "[SQL_REMOVED] "),
             (r"(OR|AND)\s+1\s*=\s*1", "[SQL_REMOVED]"),
             (r"--\s*$", ""),  # SQL comments
         ]
-    
-    def sanitize(self, prompt: str, remove_pii: bool = True, 
-                 remove_sql: bool = True) -> Tuple[str, List[str]]:
+
+        # Compile everything once - per-call re.search/re.sub with raw
+        # strings re-parses patterns through the re module cache
+        self.instruction_patterns = [
+            (re.compile(p, re.IGNORECASE), r) for p, r in instruction_patterns]
+        # PII classes are pure ASCII, so re.ASCII lets \b and \d skip the
+        # Unicode category tables during the scan
+        self.pii_patterns = [
+            (re.compile(p, re.ASCII), r) for p, r in pii_patterns]
+        self.sql_patterns = [
+            (re.compile(p, re.IGNORECASE), r) for p, r in sql_patterns]
+
+        # Union alternations: one scan per group instead of one per pattern
+        self._instr_union, self._instr_repls, self._instr_texts = \
+            self._build_union(instruction_patterns, re.IGNORECASE)
+        # PII union variants, picked per prompt by two cheap probes: the
+        # numeric patterns (SSN, card, phone) all require a run of 3+
+        # digits, and the key/token patterns require _MIN_TOKEN_LEN
+        # characters. Each variant is a (union, repls, texts) triple with
+        # its own group numbering.
+        digit_idx = frozenset(
+            i for i, (p, _r) in enumerate(pii_patterns) if r"\d" in p)
+        token_idx = {len(pii_patterns) - 2, len(pii_patterns) - 1}
+
+        def pii_variant(indices):
+            return self._build_union(
+                [pii_patterns[i] for i in indices], re.ASCII)
+
+        all_idx = range(len(pii_patterns))
+        self._pii_full = pii_variant(all_idx)
+        self._pii_short = pii_variant(
+            [i for i in all_idx if i not in token_idx])
+        self._pii_nodigit = pii_variant(
+            [i for i in all_idx if i not in digit_idx])
+        self._pii_nodigit_short = pii_variant(
+            [i for i in all_idx if i not in digit_idx and i not in token_idx])
+        self._pii_digit_idx = digit_idx
+        self._pii_texts = self._pii_full[2]
+
+        # Digit-run probe: Numba kernel when available (warmed here so the
+        # JIT compile isn't paid on the first request), regex otherwise
+        self._digit_run = re.compile(r"\d\d\d", re.ASCII)
+        if NUMBA_AVAILABLE:
+            _digit_run_kernel(np.zeros(1, dtype=np.uint8))
+        self._sql_union, self._sql_repls, self._sql_texts = \
+            self._build_union(sql_patterns, re.IGNORECASE)
+
+        # Hyperscan prefilter over all three groups: ids are assigned in
+        # group order so a scan's hit ids map back to (instr, pii, sql)
+        self._hs_db = None
+        self._hs_pii_range = (len(instruction_patterns),
+                              len(instruction_patterns) + len(pii_patterns))
+        if HYPERSCAN_AVAILABLE:
+            all_patterns = ([p for p, _ in instruction_patterns] +
+                            [p for p, _ in pii_patterns] +
+                            [p for p, _ in sql_patterns])
+            flags = ([hyperscan.HS_FLAG_CASELESS] * len(instruction_patterns) +
+                     [0] * len(pii_patterns) +
+                     [hyperscan.HS_FLAG_CASELESS] * len(sql_patterns))
+            try:
+                db = hyperscan.Database()
+                db.compile(
+                    expressions=[p.encode() for p in all_patterns],
+                    ids=list(range(len(all_patterns))),
+                    flags=flags
+                )
+                self._hs_db = db
+            except Exception as e:
+                print(f"[!] Failed to compile sanitizer Hyperscan database: {e}")
+
+        # Fast-reject character sets: every sanitizer pattern needs at
+        # least one of these characters to match (digits/@/'/-/_ for the
+        # PII, SQL and token patterns; the letters are the first letters
+        # of the instruction keywords - ignore, disregard, forget, new,
+        # system, you, roleplay, pretend, DAN, developer)
+        self._trigger_chars = frozenset("@0123456789'-_")
+        self._trigger_kw_firsts = frozenset("idfnsyrp")
+
+        # Named PII patterns for contains_pii / get_pii_types
+        self._pii_named = {
+            "SSN": re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+            "Credit Card": re.compile(r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b"),
+            "Email": re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"),
+            "Phone": re.compile(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b"),
+            "API Key": re.compile(r"sk-[a-zA-Z0-9]{32,}"),
+        }
+
+    def sanitize(self, prompt: str, remove_pii: bool = True,
+                 remove_sql: bool = True,
+                 collect_changes: bool = True) -> Tuple[str, List[str]]:
         """
         Sanitize prompt
-        
+
         Args:
             prompt: Original prompt
             remove_pii: Whether to remove PII
             remove_sql: Whether to remove SQL injection attempts
-        
+            collect_changes: When False, skip building the change
+                descriptions entirely and return an empty list
+
         Returns:
             Tuple of (sanitized_prompt, list_of_changes)
         """
+        # Fast reject: two C-level set-membership sweeps decide whether any
+        # pattern group could possibly match; benign prompts skip every
+        # regex pass entirely. Only prompts too short for the {32,}
+        # key/token patterns qualify - their alphabet is all of
+        # [a-zA-Z0-9_-], which no character set can rule out. Whitespace
+        # is still collapsed so the fast path returns the same shape as
+        # the full pass.
+        if (len(prompt) < self._MIN_TOKEN_LEN
+                and self._trigger_chars.isdisjoint(prompt)
+                and self._trigger_kw_firsts.isdisjoint(prompt.lower())):
+            return ' '.join(prompt.split()), []
+
         sanitized = prompt
         changes = []
-        
+
+        # One Hyperscan pass tells us which groups can possibly match;
+        # groups with no candidate hits are skipped entirely
+        hit_instr = hit_pii = hit_sql = True
+        if self._hs_db is not None:
+            ids = self._hs_matched_ids(prompt)
+            pii_lo, pii_hi = self._hs_pii_range
+            hit_instr = any(i < pii_lo for i in ids)
+            hit_pii = any(pii_lo <= i < pii_hi for i in ids)
+            hit_sql = any(i >= pii_hi for i in ids)
+
         # Remove malicious instructions
-        for pattern, replacement in self.instruction_patterns:
-            if re.search(pattern, sanitized, re.IGNORECASE):
-                sanitized = re.sub(pattern, replacement, sanitized, 
-                                  flags=re.IGNORECASE)
-                changes.append(f"Removed malicious instruction: {pattern}")
-        
+        if hit_instr:
+            sanitized, hits = self._apply_union(
+                self._instr_union, self._instr_repls, sanitized,
+                collect_changes)
+            for idx in sorted(set(hits)):
+                changes.append(
+                    f"Removed malicious instruction: {self._instr_texts[idx]}")
+
         # Remove PII
-        if remove_pii:
-            for pattern, replacement in self.pii_patterns:
-                if re.search(pattern, sanitized):
-                    sanitized = re.sub(pattern, replacement, sanitized)
-                    changes.append(f"Redacted PII: {pattern[:20]}...")
-        
+        if remove_pii and hit_pii:
+            union, repls, texts = self._select_pii_variant(sanitized)
+            sanitized, hits = self._apply_union(
+                union, repls, sanitized, collect_changes)
+            for idx in sorted(set(hits)):
+                changes.append(f"Redacted PII: {texts[idx][:20]}...")
+
         # Remove SQL injection
-        if remove_sql:
-            for pattern, replacement in self.sql_patterns:
-                if re.search(pattern, sanitized, re.IGNORECASE):
-                    sanitized = re.sub(pattern, replacement, sanitized, 
-                                      flags=re.IGNORECASE)
-                    changes.append(f"Removed SQL injection: {pattern[:20]}...")
+        if remove_sql and hit_sql:
+            sanitized, hits = self._apply_union(
+                self._sql_union, self._sql_repls, sanitized, collect_changes)
+            for idx in sorted(set(hits)):
+                changes.append(
+                    f"Removed SQL injection: {self._sql_texts[idx][:20]}...")
         
-        # Clean up multiple spaces and newlines
-        sanitized = re.sub(r'\s+', ' ', sanitized).strip()
+        # Clean up multiple spaces and newlines; split/join collapses all
+        # whitespace runs in one C pass, no regex engine involved
+        sanitized = ' '.join(sanitized.split())
         
         return sanitized, changes
     
+    def sanitize_fast(self, prompt: str) -> str:
+        """Sanitize and return only the cleaned prompt
+
+        Fast path for callers that discard the change descriptions - no
+        per-match f-string formatting or list building happens at all.
+        """
+        return self.sanitize(prompt, collect_changes=False)[0]
+
+    @classmethod
+    def _build_union(cls, patterns: List[Tuple[str, str]], flags: int = 0):
+        """Compile a pattern group into a single named-group alternation
+
+        Returns (union_regex, replacements, pattern_texts); the alternative
+        that matched is recovered from m.lastgroup during substitution.
+        """
+        alternation = "|".join(
+            f"(?P<g{i}>{cls._CAPTURING_GROUP.sub('(?:', p)})"
+            for i, (p, _repl) in enumerate(patterns)
+        )
+        return (re.compile(alternation, flags),
+                [repl for _p, repl in patterns],
+                [p for p, _repl in patterns])
+
+    @staticmethod
+    def _apply_union(union, repls: List[str], text: str,
+                     collect: bool = True) -> Tuple[str, List[int]]:
+        """Run one union scan over text; returns (new_text, matched indices)
+
+        With collect=False the hit indices are not recorded, saving a
+        list append per match when the caller discards the changes.
+        """
+        hits: List[int] = []
+
+        def _dispatch(m):
+            idx = int(m.lastgroup[1:])
+            if collect:
+                hits.append(idx)
+            return repls[idx]
+
+        return union.sub(_dispatch, text), hits
+
+    def _select_pii_variant(self, text: str):
+        """Pick the PII union variant the text could actually match"""
+        has_digits = self._has_digit_run(text)
+        if len(text) >= self._MIN_TOKEN_LEN:
+            return self._pii_full if has_digits else self._pii_nodigit
+        return self._pii_short if has_digits else self._pii_nodigit_short
+
+    def _has_digit_run(self, text: str) -> bool:
+        """True if text contains three or more consecutive digits"""
+        if NUMBA_AVAILABLE:
+            buf = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+            return bool(_digit_run_kernel(buf))
+        return self._digit_run.search(text) is not None
+
+    def _hs_matched_ids(self, prompt: str) -> set:
+        """Scan prompt through the Hyperscan prefilter; returns hit ids"""
+        ids = set()
+        self._hs_db.scan(
+            prompt.encode(),
+            match_event_handler=lambda pat_id, start, end, flags, ctx:
+                ids.add(pat_id)
+        )
+        return ids
+
     def contains_pii(self, prompt: str) -> bool:
         """Check if prompt contains PII"""
-        for pattern, _ in self.pii_patterns:
-            if re.search(pattern, prompt):
+        if self._hs_db is not None:
+            ids = self._hs_matched_ids(prompt)
+            pii_lo, pii_hi = self._hs_pii_range
+            if not any(pii_lo <= i < pii_hi for i in ids):
+                return False
+        # Without a 3+ digit run the numeric patterns cannot match
+        check_digits = self._has_digit_run(prompt)
+        for idx, (pattern, _) in enumerate(self.pii_patterns):
+            if not check_digits and idx in self._pii_digit_idx:
+                continue
+            if pattern.search(prompt):
                 return True
         return False
-    
+
     def get_pii_types(self, prompt: str) -> List[str]:
         """Get types of PII found in prompt"""
-        pii_types = []
-        
-        if re.search(r"\b\d{3}-\d{2}-\d{4}\b", prompt):
-            pii_types.append("SSN")
-        if re.search(r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b", prompt):
-            pii_types.append("Credit Card")
-        if re.search(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", prompt):
-            pii_types.append("Email")
-        if re.search(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b", prompt):
-            pii_types.append("Phone")
-        if re.search(r"sk-[a-zA-Z0-9]{32,}", prompt):
-            pii_types.append("API Key")
-        
-        return pii_types
+        return [name for name, pattern in self._pii_named.items()
+                if pattern.search(prompt)]
 
 
-# Singleton instance
-_sanitizer = None
+# Singleton instance, built at import: construction is cheap, the object
+# is immutable after init, and eager creation drops the None-check branch
+# from every per-request lookup
+_sanitizer = PromptSanitizer()
 
 def get_sanitizer() -> PromptSanitizer:
-    """Get or create sanitizer instance"""
-    global _sanitizer
-    if _sanitizer is None:
-        _sanitizer = PromptSanitizer()
+    """Get the shared sanitizer instance"""
     return _sanitizer
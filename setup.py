@@ -29,9 +29,9 @@ def main():
     print(" "*20 + "PROMPT FIREWALL - SETUP")
     print("="*70)
     
-    # Check Python version
-    if sys.version_info < (3, 8):
-        print("\n[!] Python 3.8+ required")
+    # Check Python version (dataclass slots=True needs 3.10+)
+    if sys.version_info < (3, 10):
+        print("\n[!] Python 3.10+ required")
         sys.exit(1)
     
     print(f"\n[✓] Python {sys.version_info.major}.{sys.version_info.minor} detected")